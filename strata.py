@@ -1,7 +1,7 @@
 #!/usr/bin/env python3.11
 import sys
 sys.path.append("/opt/.manus/.sandbox-runtime")
-from flask import Blueprint, request, jsonify, Response
+from flask import Blueprint, request, jsonify, Response, send_file, url_for, g, has_request_context
 import requests
 import json
 import time
@@ -9,9 +9,19 @@ import logging
 import csv
 import io
 import os # Needed for file path
+import tempfile
+import threading
+import uuid
+import hmac
 import re # Needed for street name parsing
-from collections import defaultdict # For easier aggregation
+from collections import defaultdict, deque, OrderedDict # For easier aggregation
+from bisect import bisect_left, insort
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor # Background export jobs
 from rapidfuzz import fuzz, process, utils # Added for fuzzy matching
+import numpy as np # Score matrices from rapidfuzz's process.cdist
+import pyarrow as pa # Typed columnar export (Parquet / Arrow IPC)
+import pyarrow.parquet as pq
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -19,10 +29,189 @@ logger = logging.getLogger(__name__)
 
 strata_bp = Blueprint("strata", __name__)
 
+# --- Request Tracing ---
+SLOW_QUERY_THRESHOLD_SECONDS = float(os.environ.get("SLOW_QUERY_THRESHOLD_SECONDS", "2.0"))
+SLOW_QUERY_LOG_SIZE = 200 # Most recent slow requests kept in memory
+SLOW_QUERY_LOG = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+ADMIN_TOKEN = os.environ.get("NSW_ADMIN_TOKEN") # Required by the admin endpoints; they are disabled when unset
+TRACE_MAX_UPSTREAM_PAGES = 10 # Upstream pages traced individually; later pages are folded into one "upstream-rest" phase
+_slow_query_log_lock = threading.Lock()
+
+
+def current_trace():
+    """The trace for the current request, or None outside a request (e.g. background export jobs)"""
+    if not has_request_context():
+        return None
+    return g.get("strata_trace")
+
+
+def record_phase(name, duration, **details):
+    """Append a timed phase to the current request's trace, if any"""
+    trace = current_trace()
+    if trace is not None:
+        trace["phases"].append({"name": name, "duration_ms": round(duration * 1000, 3), **details})
+
+
+def record_upstream_page(duration, page, page_bytes, error=None):
+    """Trace one upstream page, folding pages past TRACE_MAX_UPSTREAM_PAGES into a single summary phase.
+    error names the failure (timeout, http_503, connection, bad_json, ...) for pages that did not succeed."""
+    trace = current_trace()
+    if trace is None:
+        return
+    trace["upstream_pages"] = trace.get("upstream_pages", 0) + 1
+    if trace["upstream_pages"] <= TRACE_MAX_UPSTREAM_PAGES:
+        if error:
+            record_phase("upstream", duration, page=page, bytes=page_bytes, error=error)
+        else:
+            record_phase("upstream", duration, page=page, bytes=page_bytes)
+        return
+    rest = trace.get("upstream_rest")
+    if rest is None:
+        rest = trace["upstream_rest"] = {"name": "upstream-rest", "duration_ms": 0, "pages": 0, "bytes": 0, "errors": 0}
+        trace["phases"].append(rest)
+    rest["duration_ms"] = round(rest["duration_ms"] + duration * 1000, 3)
+    rest["pages"] += 1
+    rest["bytes"] += page_bytes
+    if error:
+        rest["errors"] += 1
+
+
+@contextmanager
+def traced(name, **details):
+    """Time the enclosed block as a trace phase. The yielded dict can be filled with extra details."""
+    phase_start_time = time.time()
+    try:
+        yield details
+    finally:
+        record_phase(name, time.time() - phase_start_time, **details)
+
+
+def traced_jsonify(payload):
+    with traced("serialize") as phase:
+        response = jsonify(payload)
+        phase["bytes"] = response.content_length
+    return response
+
+
+def traced_stream(chunks):
+    """Wrap a streamed response body so the time spent producing it is traced as a "serialize" phase.
+
+    The body is generated after after_request has run, so the trace object is captured here rather than
+    looked up through flask.g; str chunks are encoded to bytes so the size can be counted.
+    """
+    trace = current_trace()
+    if trace is None:
+        return chunks
+    trace["streamed"] = True
+
+    def generate():
+        serialize_duration = 0
+        total_bytes = 0
+        iterator = iter(chunks)
+        try:
+            while True:
+                chunk_start_time = time.time()
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    break
+                if isinstance(chunk, str):
+                    chunk = chunk.encode("utf-8")
+                serialize_duration += time.time() - chunk_start_time
+                total_bytes += len(chunk)
+                yield chunk
+        finally:
+            trace["phases"].append({"name": "serialize", "duration_ms": round(serialize_duration * 1000, 3), "bytes": total_bytes, "streamed": True})
+
+    return generate()
+
+
+def _log_if_slow(trace, status_code):
+    """Add a finished request to SLOW_QUERY_LOG if it went over the threshold; runs when the response is closed"""
+    total_duration = time.time() - trace["started_at"]
+    if total_duration < SLOW_QUERY_THRESHOLD_SECONDS:
+        return
+    entry = {key: value for key, value in trace.items() if key not in ("upstream_rest", "streamed")} # upstream_rest is already in phases
+    entry.update(status=status_code, total_ms=round(total_duration * 1000, 3))
+    with _slow_query_log_lock:
+        SLOW_QUERY_LOG.append(entry)
+    logger.warning(f"Slow request {trace['trace_id']} {trace['method']} {trace['path']} {trace['args']} took {total_duration:.4f}s")
+
+
+def _server_timing_header(trace, total_duration):
+    entries = []
+    for phase in trace["phases"]:
+        desc = ", ".join(f"{key}={value}" for key, value in phase.items() if key not in ("name", "duration_ms"))
+        entry = f"{phase['name']};dur={phase['duration_ms']}"
+        if desc:
+            entry += ';desc="' + desc.replace('"', "'") + '"'
+        entries.append(entry)
+    entries.append(f"total;dur={round(total_duration * 1000, 3)}")
+    return ", ".join(entries)
+
+
+@strata_bp.before_request
+def start_request_trace():
+    g.strata_trace = {
+        "trace_id": uuid.uuid4().hex,
+        "started_at": time.time(),
+        "method": request.method,
+        "path": request.path,
+        "args": request.args.to_dict(),
+        "phases": []
+    }
+
+
+@strata_bp.after_request
+def finish_request_trace(response):
+    trace = current_trace()
+    if trace is None:
+        return response
+    total_duration = time.time() - trace["started_at"]
+    # For streamed bodies (exports) the header can only cover the phases before the body is sent;
+    # the slow-query log entry is finalised on close, so it includes serialization.
+    response.headers["Server-Timing"] = _server_timing_header(trace, total_duration)
+    response.headers["X-Trace-Id"] = trace["trace_id"]
+    if request.endpoint != "strata.list_slow_queries":
+        status_code = response.status_code
+        response.call_on_close(lambda: _log_if_slow(trace, status_code))
+    return response
+
+
+@strata_bp.route("/admin/slow_queries", methods=["GET"])
+def list_slow_queries():
+    if not ADMIN_TOKEN:
+        return jsonify({"error": "Admin endpoints are disabled. Set NSW_ADMIN_TOKEN to enable them."}), 404
+    # Header only, so the token stays out of access logs and browser history
+    if not hmac.compare_digest(request.headers.get("X-Admin-Token", "").encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+        return jsonify({"error": "Admin token required."}), 403
+    trace_id_filter = request.args.get("trace_id")
+    path_filter = request.args.get("path")
+    suburb_filter = (request.args.get("suburb") or "").strip().upper()
+    try:
+        min_ms = float(request.args.get("min_ms", 0))
+        limit = int(request.args.get("limit", 50))
+    except ValueError:
+        return jsonify({"error": "min_ms and limit must be numbers."}), 400
+
+    with _slow_query_log_lock:
+        entries = list(SLOW_QUERY_LOG)
+    matching = [
+        entry for entry in reversed(entries) # Newest first
+        if entry["total_ms"] >= min_ms
+        and (not trace_id_filter or entry["trace_id"] == trace_id_filter)
+        and (not path_filter or entry["path"].endswith(path_filter))
+        and (not suburb_filter or (entry["args"].get("suburb") or "").strip().upper() == suburb_filter)
+    ]
+    return jsonify(matching[:max(limit, 0)])
+# --- End Request Tracing ---
+
 # --- Suburb Validation Setup ---
 NSW_SUBURBS = set()
 SUBURBS_FILE_PATH = os.path.join(os.path.dirname(__file__), "nsw_suburbs_opendatasoft.csv")
 FUZZY_MATCH_THRESHOLD = 85 # Threshold for fuzzy matching
+# Suburbs searched by postcode as well, since the suburb field alone misses buildings there
+POSTCODE_FALLBACK_SUBURBS = {"MANLY": 2095, "CREMORNE": 2090, "NEWINGTON": 2127, "NEUTRAL BAY": 2089}
 
 def load_nsw_suburbs():
     if NSW_SUBURBS:
@@ -105,7 +294,8 @@ API_URL = "https://portal.spatial.nsw.gov.au/server/rest/services/StrataHub/Feat
 FIELDS_TO_RETRIEVE = ["planlabel", "address", "suburb", "postcode", "lga", "lottotal"]
 MAX_RECORDS_PER_REQUEST = 1000
 
-def fetch_strata_data(where_clause):
+def fetch_strata_data(where_clause, progress_callback=None):
+    # progress_callback, if given, is called after each upstream page with the number of features on that page.
     fetch_start_time = time.time()
     result_offset = 0
     all_features = []
@@ -119,41 +309,81 @@ def fetch_strata_data(where_clause):
             "orderByFields": "lottotal DESC",
             "f": "json"
         }
+        page_number = result_offset // MAX_RECORDS_PER_REQUEST + 1
+        page_start_time = time.time()
+        page_duration = None
+        page_error = None
+        response = None
         try:
             response = requests.get(API_URL, params=query_params, timeout=60)
             response.raise_for_status()
             data = response.json()
+            page_duration = time.time() - page_start_time
             if "error" in data:
+                page_error = "api_error"
                 logger.error(f"Error querying API: {data.get('error')}")
                 return None, f"API Error: {data.get('error', {}).get('message', 'Unable to complete operation')}"
             features = data.get("features", [])
             if not features:
                 break
             all_features.extend([f["attributes"] for f in features])
+            if progress_callback:
+                progress_callback(len(features))
             if not data.get("exceededTransferLimit", False):
                 break
             else:
                 result_offset += len(features)
                 time.sleep(0.1)
         except requests.exceptions.Timeout:
+            page_error = "timeout"
             logger.error("API request timed out.")
             return None, "API request timed out."
+        except requests.exceptions.HTTPError as e:
+            page_error = f"http_{e.response.status_code}" if e.response is not None else "http"
+            logger.error(f"Error making API request: {e}")
+            return None, f"Error making API request: {e}"
+        except requests.exceptions.ConnectionError as e:
+            page_error = "connection"
+            logger.error(f"Error making API request: {e}")
+            return None, f"Error making API request: {e}"
         except requests.exceptions.RequestException as e:
+            page_error = "request"
             logger.error(f"Error making API request: {e}")
             return None, f"Error making API request: {e}"
         except json.JSONDecodeError:
+            page_error = "bad_json"
             logger.error(f"Error decoding JSON response. Text: {response.text}")
             return None, "Error decoding API response."
         except Exception as e:
+            page_error = page_error or "unexpected"
             logger.error(f"An unexpected error occurred: {e}")
             return None, f"An unexpected error occurred: {e}"
+        finally:
+            # Recorded however the page ended, so timeouts and failed pages show up in the breakdown
+            record_upstream_page(
+                page_duration if page_duration is not None else time.time() - page_start_time,
+                page_number,
+                len(response.content) if response is not None else 0,
+                error=page_error
+            )
     logger.info(f"[PROFILE] fetch_strata_data completed in {time.time() - fetch_start_time:.4f}s. Total features: {len(all_features)}")
     return all_features, None
 
-def build_suburb_where_clause(suburb):
+def build_suburb_where_clause(suburb, resolution=None):
+    # resolution, if given, is filled with the match method and the canonical suburb name.
+    with traced("resolve") as phase:
+        phase["method"] = "none"
+        result = _build_suburb_where_clause(suburb, phase)
+    if resolution is not None:
+        resolution.update(phase)
+    return result
+
+
+def _build_suburb_where_clause(suburb, resolution):
+    # resolution is filled with the match method (exact, nsw_strip, fuzzy) for tracing, and the canonical name.
     if not suburb:
         return None, "Please provide a suburb name."
-    suburb_upper = suburb.strip().upper()
+    suburb_upper = _normalise_suburb_input(suburb)
     suburb_to_query = None
     validation_error = None
 
@@ -163,31 +393,28 @@ def build_suburb_where_clause(suburb):
         if not NSW_SUBURBS:
              return None, "Suburb validation list could not be loaded. Cannot validate suburb."
 
-    # 1. Exact match attempt
-    if suburb_upper in NSW_SUBURBS:
-        suburb_to_query = suburb_upper
+    # 1. Exact match attempt, then 2. with "(NSW)" stripped (shared with resolve_suburbs_bulk)
+    suburb_to_query, exact_method = _resolve_suburb_exact(suburb_upper)
+    if suburb_to_query:
+        resolution["method"] = exact_method
     else:
-        # 2. Try stripping "(NSW)" and exact match again
-        plain_suburb_name = re.sub(r'\s*\(NSW\)\s*$', '', suburb_upper, flags=re.IGNORECASE)
-        if plain_suburb_name in NSW_SUBURBS:
-            suburb_to_query = plain_suburb_name
-        else:
-            # 3. Fuzzy match fallback (if not a special postcode case that should skip fuzzy)
-            # Special postcode cases are handled in get_combined_data, so we attempt fuzzy match here for all non-exact matches.
-            if NSW_SUBURBS: # Ensure list is available for matching
-                query_suburb_processed = utils.default_process(suburb_upper)
-                # Convert NSW_SUBURBS set to list for process.extractOne
-                match = process.extractOne(query_suburb_processed, list(NSW_SUBURBS), scorer=fuzz.WRatio, score_cutoff=FUZZY_MATCH_THRESHOLD, processor=utils.default_process)
-                
-                if match:
-                    suburb_to_query = match[0] # This is the original uppercase name from NSW_SUBURBS
-                    logger.info(f"Fuzzy matched input '{suburb}' to '{suburb_to_query}' with score {match[1]}.")
-                    validation_error = None # Clear previous error if fuzzy match succeeds
-                else:
-                    logger.info(f"Fuzzy matching failed for input '{suburb}'. No match above threshold {FUZZY_MATCH_THRESHOLD}.")
-                    validation_error = f"Invalid NSW Suburb: \"{suburb}\". Please enter a valid NSW suburb name from the official list."
+        # 3. Fuzzy match fallback (if not a special postcode case that should skip fuzzy)
+        # Special postcode cases are handled in get_combined_data, so we attempt fuzzy match here for all non-exact matches.
+        if NSW_SUBURBS: # Ensure list is available for matching
+            # Same scorer and tie-break as resolve_suburbs_bulk, so both paths pick the same suburb
+            match = _fuzzy_match_suburbs([suburb_upper])[0]
+            
+            if match:
+                suburb_to_query = match[0] # This is the original uppercase name from NSW_SUBURBS
+                resolution["method"] = "fuzzy"
+                resolution["score"] = round(match[1], 1)
+                logger.info(f"Fuzzy matched input '{suburb}' to '{suburb_to_query}' with score {match[1]}.")
+                validation_error = None # Clear previous error if fuzzy match succeeds
             else:
-                 validation_error = f"Invalid NSW Suburb: \"{suburb}\". Suburb list unavailable for fuzzy matching."
+                logger.info(f"Fuzzy matching failed for input '{suburb}'. No match above threshold {FUZZY_MATCH_THRESHOLD}.")
+                validation_error = f"Invalid NSW Suburb: \"{suburb}\". Please enter a valid NSW suburb name from the official list."
+        else:
+             validation_error = f"Invalid NSW Suburb: \"{suburb}\". Suburb list unavailable for fuzzy matching."
     
     # This block for special suburbs like MANLY was part of the original error handling.
     # It's now largely superseded by fuzzy matching or handled in get_combined_data for postcode fallbacks.
@@ -196,7 +423,7 @@ def build_suburb_where_clause(suburb):
         # The special check for MANLY etc. was to allow them despite a small test list.
         # With a full list and fuzzy matching, this specific warning might be less relevant
         # but keeping it for now to see behavior with fuzzy logic.
-        if suburb_upper in ["MANLY", "CREMORNE", "NEWINGTON", "NEUTRAL BAY"]:
+        if suburb_upper in POSTCODE_FALLBACK_SUBURBS:
              logger.warning(f"Proceeding with {suburb_upper} despite validation error '{validation_error}' (special case or postcode fallback expected).")
              # We allow it to proceed so get_combined_data can try postcode fallback for these specific suburbs.
              # For other suburbs, the error from fuzzy matching (or lack thereof) will be returned.
@@ -205,66 +432,71 @@ def build_suburb_where_clause(suburb):
 
     # If suburb_to_query is set (either by exact or fuzzy match), build the clause
     if suburb_to_query:
+        resolution["canonical"] = suburb_to_query
         sanitized_suburb_sql = suburb_to_query.replace("-", " ").replace("\"", "\"\"") # Basic SQL sanitization
         where_clause = f"UPPER(suburb) LIKE UPPER('%{sanitized_suburb_sql}%')"
         return where_clause, None
     
     # Fallback if suburb_to_query is somehow not set but no validation_error was returned (should ideally not happen with current logic)
     # Or if it's one of the special cases that had an error but we let it pass for postcode search.
-    if suburb_upper in ["MANLY", "CREMORNE", "NEWINGTON", "NEUTRAL BAY"] and validation_error:
+    if suburb_upper in POSTCODE_FALLBACK_SUBURBS and validation_error:
         logger.info(f"Allowing {suburb_upper} to proceed to get_combined_data for potential postcode search, despite validation error: {validation_error}")
         # Return None for where_clause, but also None for error, so get_combined_data tries postcode.
         return None, None 
 
     return None, validation_error if validation_error else f"Internal error during suburb validation for \"{suburb}\""
 
-def get_combined_data(suburb):
-    suburb_upper = suburb.strip().upper() if suburb else ""
+def get_combined_data(suburb, progress_callback=None):
+    """Fetch buildings for a suburb. Returns (data, source, error); source identifies what was actually
+    queried, ("suburb", canonical name) or ("suburb", canonical name, fallback postcode)."""
+    suburb_upper = _normalise_suburb_input(suburb) if suburb else ""
     final_data = []
     errors = []
     data_suburb = None
     data_postcode = None
 
-    where_suburb, error_suburb = build_suburb_where_clause(suburb)
+    resolution = {}
+    where_suburb, error_suburb = build_suburb_where_clause(suburb, resolution)
 
     # If build_suburb_where_clause returns an error, and it's not a special postcode fallback case, return the error immediately.
-    if error_suburb and suburb_upper not in ["MANLY", "CREMORNE", "NEWINGTON", "NEUTRAL BAY"]:
-        return None, error_suburb
+    if error_suburb and suburb_upper not in POSTCODE_FALLBACK_SUBURBS:
+        return None, None, error_suburb
 
     if where_suburb: # If a valid where_clause for suburb was built (exact or fuzzy match)
-        data_suburb, error_fetch_suburb = fetch_strata_data(where_suburb)
+        data_suburb, error_fetch_suburb = fetch_strata_data(where_suburb, progress_callback)
         if error_fetch_suburb:
             errors.append(f"Suburb search error: {error_fetch_suburb}")
     elif error_suburb: # This means validation failed, but it might be a special case we let through for postcode search
         logger.warning(f"Suburb validation failed for {suburb}: {error_suburb}. Proceeding to check for postcode fallback.")
 
     # Postcode fallback logic for specific suburbs
-    postcode_to_search = None
-    if suburb_upper == "MANLY": postcode_to_search = 2095
-    elif suburb_upper == "CREMORNE": postcode_to_search = 2090
-    elif suburb_upper == "NEWINGTON": postcode_to_search = 2127
-    elif suburb_upper == "NEUTRAL BAY": postcode_to_search = 2089
+    postcode_to_search = POSTCODE_FALLBACK_SUBURBS.get(suburb_upper)
+    source = ("suburb", resolution.get("canonical", suburb_upper))
+    if postcode_to_search:
+        source += (postcode_to_search,)
 
     if postcode_to_search:
         logger.info(f"Attempting postcode fallback search for {suburb_upper} with postcode {postcode_to_search}")
         where_postcode = f"postcode = {postcode_to_search}"
-        data_postcode, error_fetch_postcode = fetch_strata_data(where_postcode)
+        data_postcode, error_fetch_postcode = fetch_strata_data(where_postcode, progress_callback)
         if error_fetch_postcode:
             errors.append(f"Postcode search error: {error_fetch_postcode}")
         
-        combined_dict = {}
-        if data_postcode: # Prioritize postcode data if available for these specific suburbs
-            for item in data_postcode:
-                key = item.get("planlabel")
-                if key: combined_dict[key] = item
-        
-        # Add suburb data only if not already present from postcode search (to avoid duplicates)
-        if data_suburb:
-            for item in data_suburb:
-                key = item.get("planlabel")
-                if key and key not in combined_dict: 
-                    combined_dict[key] = item
-        final_data = list(combined_dict.values())
+        with traced("merge") as phase:
+            combined_dict = {}
+            if data_postcode: # Prioritize postcode data if available for these specific suburbs
+                for item in data_postcode:
+                    key = item.get("planlabel")
+                    if key: combined_dict[key] = item
+            
+            # Add suburb data only if not already present from postcode search (to avoid duplicates)
+            if data_suburb:
+                for item in data_suburb:
+                    key = item.get("planlabel")
+                    if key and key not in combined_dict: 
+                        combined_dict[key] = item
+            final_data = list(combined_dict.values())
+            phase["rows"] = len(final_data)
     else:
         final_data = data_suburb if data_suburb else []
 
@@ -273,73 +505,335 @@ def get_combined_data(suburb):
     if final_data:
         if final_error_msg: 
             logger.warning(f"Returning partial data for {suburb} due to errors: {final_error_msg}")
-        return final_data, None # If we have data, suppress minor fetch errors for now
+        return final_data, source, None # If we have data, suppress minor fetch errors for now
     
     # If no data, and there was an initial suburb validation error (and not overridden by successful postcode search)
     if not final_data and error_suburb:
-        return None, error_suburb
+        return None, None, error_suburb
     
     # If no data and other fetch errors occurred
     if not final_data and final_error_msg:
-        return None, final_error_msg
+        return None, None, final_error_msg
 
-    return final_data, final_error_msg # Should be ([], None) if no data and no errors
+    return final_data, source, final_error_msg # Should be ([], source, None) if no data and no errors
 
 
-def aggregate_data_by_street(building_data_list, original_suburb_query):
-    agg_start_time = time.time()
-    if not building_data_list:
-        logger.info(f"[PROFILE] aggregate_data_by_street (empty list): {time.time() - agg_start_time:.4f}s")
-        return []
-    street_aggregation = defaultdict(lambda: {"total_lots_on_street": 0, "property_count": 0, "suburb": original_suburb_query.upper()})
-    total_parsing_time = 0
-    for i, building in enumerate(building_data_list):
-        if i % 500 == 0 and i > 0:
-            logger.info(f"[PROFILE] Aggregating building {i}/{len(building_data_list)}. Current total_parsing_time: {total_parsing_time:.4f}s. Elapsed: {time.time() - agg_start_time:.4f}s")
+# --- Bulk Suburb Resolution ---
+BULK_RESOLVE_MAX_INPUTS = 50000 # Raw values accepted per bulk request
+BULK_RESOLVE_CHUNK_SIZE = 500 # Queries scored per cdist call; bounds the score matrix to chunk x gazetteer size
+_suburb_choices_cache = {}
+
+
+def _suburb_choices():
+    """Gazetteer names and their pre-processed forms for batched fuzzy matching, built once per loaded list"""
+    if _suburb_choices_cache.get("count") != len(NSW_SUBURBS):
+        names = sorted(NSW_SUBURBS)
+        _suburb_choices_cache.update(count=len(NSW_SUBURBS), names=names, processed=[utils.default_process(name) for name in names])
+    return _suburb_choices_cache["names"], _suburb_choices_cache["processed"]
+
+
+def _normalise_suburb_input(raw):
+    """Suburb input as every lookup sees it (search, exports, bulk resolution): surrounding whitespace stripped, uppercased"""
+    return str(raw).strip().upper() if raw is not None else ""
+
+
+def _fuzzy_match_suburbs(queries):
+    """Fuzzy match normalised suburb queries against the gazetteer with rapidfuzz's process.cdist.
+
+    Returns one (name, score) per query, or None below FUZZY_MATCH_THRESHOLD. Ties go to the first name in
+    sorted order, so single searches and bulk resolution always agree.
+    """
+    names, processed_names = _suburb_choices()
+    processed_queries = [utils.default_process(query) for query in queries]
+    matches = []
+    for start in range(0, len(processed_queries), BULK_RESOLVE_CHUNK_SIZE):
+        scores = process.cdist(
+            processed_queries[start:start + BULK_RESOLVE_CHUNK_SIZE], processed_names,
+            scorer=fuzz.WRatio, score_cutoff=FUZZY_MATCH_THRESHOLD, workers=-1 if len(queries) > 1 else 1
+        )
+        best_indexes = np.argmax(scores, axis=1)
+        for offset, best_index in enumerate(best_indexes):
+            score = float(scores[offset, best_index])
+            matches.append((names[best_index], score) if score > 0 else None) # cdist reports scores below score_cutoff as 0
+    return matches
+
+
+def _resolve_suburb_exact(suburb_upper):
+    """Exact and "(NSW)"-stripped lookups. Returns (canonical, method) or (None, None)."""
+    if suburb_upper in NSW_SUBURBS:
+        return suburb_upper, "exact"
+    plain_suburb_name = re.sub(r'\s*\(NSW\)\s*$', '', suburb_upper, flags=re.IGNORECASE)
+    if plain_suburb_name in NSW_SUBURBS:
+        return plain_suburb_name, "nsw_strip"
+    return None, None
+
+
+def resolve_suburbs_bulk(raw_suburbs):
+    """Map raw suburb strings to canonical NSW suburbs.
+
+    Inputs are deduplicated after the same normalisation a search applies. Exact and "(NSW)"-stripped matches are
+    dictionary lookups; the rest are fuzzy matched together with rapidfuzz's process.cdist, in parallel
+    across all cores, against the gazetteer. Inputs in POSTCODE_FALLBACK_SUBURBS also carry the postcode
+    a search would query, and resolve by it when the name does not match. Returns one dict per input, in
+    order, with input, canonical, score and method (exact, nsw_strip, fuzzy, postcode, or None when
+    unresolved), plus postcode where applicable.
+    """
+    resolve_start_time = time.time()
+    if not NSW_SUBURBS:
+        load_nsw_suburbs()
+
+    resolved = {} # normalised input -> result fields
+    fuzzy_queries = []
+    for raw in raw_suburbs:
+        normalised = _normalise_suburb_input(raw)
+        if normalised in resolved:
+            continue
+        canonical, method = _resolve_suburb_exact(normalised) if normalised else (None, None)
+        resolved[normalised] = {"canonical": canonical, "score": 100.0 if canonical else None, "method": method}
+        if not canonical and normalised:
+            fuzzy_queries.append(normalised)
+
+    if fuzzy_queries and NSW_SUBURBS:
+        for query, match in zip(fuzzy_queries, _fuzzy_match_suburbs(fuzzy_queries)):
+            if match:
+                resolved[query].update(canonical=match[0], score=round(match[1], 1), method="fuzzy")
+
+    # A search for these inputs also queries their postcode (see get_combined_data), whatever the name matched
+    for normalised, result in resolved.items():
+        if normalised in POSTCODE_FALLBACK_SUBURBS:
+            result["postcode"] = POSTCODE_FALLBACK_SUBURBS[normalised]
+            if result["method"] is None:
+                result.update(canonical=normalised, method="postcode")
+
+    results = []
+    for raw in raw_suburbs:
+        results.append({"input": raw, **resolved[_normalise_suburb_input(raw)]})
+    logger.info(f"[PROFILE] resolve_suburbs_bulk completed in {time.time() - resolve_start_time:.4f}s. {len(raw_suburbs)} inputs, {len(resolved)} unique, {len(fuzzy_queries)} fuzzy matched.")
+    return results
+
+
+def _read_uploaded_suburbs(uploaded_file):
+    """Suburb values from an uploaded text or CSV file: the first column of each non-empty row, minus a "suburb" header"""
+    text = uploaded_file.read().decode("utf-8-sig", errors="replace")
+    values = [row[0] for row in csv.reader(io.StringIO(text)) if row and row[0].strip()]
+    if values and values[0].strip().lower() == "suburb":
+        values = values[1:]
+    return values
+
+
+@strata_bp.route("/resolve_suburbs", methods=["POST"])
+def resolve_suburbs():
+    uploaded_file = request.files.get("file")
+    if uploaded_file:
+        raw_suburbs = _read_uploaded_suburbs(uploaded_file)
+    else:
+        params = request.get_json(silent=True)
+        raw_suburbs = params.get("suburbs") if isinstance(params, dict) else params
+        if raw_suburbs is None:
+            raw_suburbs = request.form.getlist("suburb")
+    if not isinstance(raw_suburbs, list) or not raw_suburbs:
+        return jsonify({"error": "Provide a list of suburbs as JSON ({\"suburbs\": [...]}) or an uploaded file."}), 400
+    if len(raw_suburbs) > BULK_RESOLVE_MAX_INPUTS:
+        return jsonify({"error": f"Too many suburbs: {len(raw_suburbs)}. The limit is {BULK_RESOLVE_MAX_INPUTS} per request."}), 400
+    if not NSW_SUBURBS:
+        load_nsw_suburbs()
+        if not NSW_SUBURBS:
+            return jsonify({"error": "Suburb validation list could not be loaded. Cannot validate suburbs."}), 500
+
+    with traced("resolve", inputs=len(raw_suburbs)):
+        results = resolve_suburbs_bulk(raw_suburbs)
+    by_method = defaultdict(int)
+    for result in results:
+        by_method[result["method"] or "unresolved"] += 1
+    return traced_jsonify({
+        "results": results,
+        "summary": {
+            "total": len(results),
+            "unique": len({_normalise_suburb_input(raw) for raw in raw_suburbs}),
+            "by_method": by_method
+        }
+    })
+# --- End Bulk Suburb Resolution ---
+
+
+# --- Incremental Street Aggregates ---
+# Street sums and rankings are kept per resolved source (e.g. ("suburb", "CHATSWOOD"), ("lga", "WILLOUGHBY"))
+# between requests. A refresh diffs the newly fetched features against the previous set by planlabel and
+# applies only the inserts, deletes and changes, so the street parsing and re-ranking cost is proportional
+# to what changed rather than to the source size.
+STREET_AGGREGATE_CACHE_SIZE = 64 # Sources whose aggregates are kept
+_street_aggregate_states = OrderedDict() # source -> state dict, least recently used first
+_street_aggregates_lock = threading.Lock() # Guards the OrderedDict only; each state has its own lock
+
+
+def _new_street_aggregate_state():
+    return {
+        "lock": threading.Lock(), # Held only while applying a diff and reading the result
+        "buildings": {}, # building key -> (address, raw lottotal, street_name, lots or None)
+        "streets": {}, # street -> [property_count, total_lots] over buildings with an address and valid lots
+        "streets_ge20": {}, # as above, over buildings with >= 20 lots only
+        "ge20_lot_sums": defaultdict(int), # street -> lots over all >= 20 lot buildings (the >=20 building view's sum)
+        "ranking": [], # sorted (-total_lots, street) for "streets"
+        "ranking_ge20": [], # sorted (-total_lots, street) for "streets_ge20"
+    }
+
+
+def _building_keys(building_data):
+    """planlabel per building, with an occurrence suffix so repeated or missing labels stay distinct"""
+    seen = defaultdict(int)
+    keys = []
+    for building in building_data:
+        planlabel = building.get("planlabel") or ""
+        occurrence = seen[planlabel]
+        seen[planlabel] += 1
+        keys.append(planlabel if occurrence == 0 else f"{planlabel}#{occurrence}")
+    return keys
+
+
+def _adjust_street(aggregates, ranking, street_name, count_delta, lots_delta):
+    """Apply a delta to one street's totals and move it to its new position in the sorted ranking"""
+    totals = aggregates.get(street_name)
+    if totals is not None:
+        del ranking[bisect_left(ranking, (-totals[1], street_name))]
+    else:
+        totals = aggregates[street_name] = [0, 0]
+    totals[0] += count_delta
+    totals[1] += lots_delta
+    if totals[0] <= 0:
+        del aggregates[street_name]
+    else:
+        insort(ranking, (-totals[1], street_name))
+
+
+def _apply_building(state, record, sign):
+    """Add (sign=1) or remove (sign=-1) one building's contribution to the street aggregates"""
+    address, _, street_name, lots = record
+    if lots is None:
+        return
+    if address:
+        _adjust_street(state["streets"], state["ranking"], street_name, sign, sign * lots)
+    if lots >= 20:
+        state["ge20_lot_sums"][street_name] += sign * lots
+        if not state["ge20_lot_sums"][street_name]:
+            del state["ge20_lot_sums"][street_name]
+        if address:
+            _adjust_street(state["streets_ge20"], state["ranking_ge20"], street_name, sign, sign * lots)
+
+
+def _ranked_street_rows(state, ranking_name, suburb, min_total_lots=0):
+    """Street rows (street_name, total_lots_on_street, property_count, suburb, cumulative_lots), read off a maintained ranking"""
+    aggregates = state["streets" if ranking_name == "ranking" else "streets_ge20"]
+    rows = []
+    cumulative_lots_running_total = 0
+    for negative_total, street_name in state[ranking_name]:
+        if -negative_total < min_total_lots:
+            break
+        cumulative_lots_running_total += -negative_total
+        rows.append({
+            "street_name": street_name,
+            "total_lots_on_street": -negative_total,
+            "property_count": aggregates[street_name][0],
+            "suburb": suburb.upper(),
+            "cumulative_lots": cumulative_lots_running_total
+        })
+    return rows
+
+
+def _street_aggregate_state(source):
+    """The maintained state for a source, created if needed; only the LRU bookkeeping takes the global lock"""
+    with _street_aggregates_lock:
+        state = _street_aggregate_states.get(source)
+        if state is None:
+            state = _street_aggregate_states[source] = _new_street_aggregate_state()
+        _street_aggregate_states.move_to_end(source)
+        while len(_street_aggregate_states) > STREET_AGGREGATE_CACHE_SIZE:
+            _street_aggregate_states.popitem(last=False)
+    return state
+
+
+def refresh_street_aggregates(source, building_data, label=None):
+    """Bring the maintained aggregates for a source up to date with freshly fetched data.
+
+    source is the resolved source returned by get_combined_data / get_export_source_data. label is the
+    caller's query, uppercased into each street row's "suburb" field as aggregate_data_by_street did; it
+    defaults to the resolved source value. Returns a snapshot dict with "street_rows", "street_ge20_rows",
+    "ge20_lot_sums" and "building_streets" (the parsed street name of each building in building_data, in order).
+    """
+    building_data = building_data or []
+    keys = _building_keys(building_data)
+    state = _street_aggregate_state(source)
+
+    # Build the new records outside any lock, parsing only new or re-addressed buildings. state["buildings"]
+    # is replaced wholesale under the state lock and never mutated, so reading it here is safe.
+    parse_start_time = time.time()
+    previous = state["buildings"]
+    current = {}
+    parsed = 0
+    for key, building in zip(keys, building_data):
         address = building.get("address")
-        lots_str = building.get("lottotal")
-        if not address or lots_str is None:
+        raw_lots = building.get("lottotal")
+        record = previous.get(key)
+        if record is not None and record[0] == address and record[1] == raw_lots:
+            current[key] = record
             continue
         try:
-            lots = int(lots_str)
+            lots = int(raw_lots)
         except (ValueError, TypeError):
-            continue
-        parsing_start_time_item = time.time()
-        street_name = parse_street_name_from_address_for_aggregation(address)
-        item_parsing_duration = time.time() - parsing_start_time_item
-        total_parsing_time += item_parsing_duration
-        if item_parsing_duration > 0.001:
-            logger.info(f"[PROFILE] Slow parse for \t'{address}\t' -> \t'{street_name}\t': {item_parsing_duration:.6f}s")
-        street_aggregation[street_name]["total_lots_on_street"] += lots
-        street_aggregation[street_name]["property_count"] += 1
-    
-    aggregated_list = []
-    for street, data in street_aggregation.items():
-        aggregated_list.append({
-            "street_name": street,
-            "total_lots_on_street": data["total_lots_on_street"],
-            "property_count": data["property_count"],
-            "suburb": data["suburb"]
-        })
-    aggregated_list.sort(key=lambda x: x["total_lots_on_street"], reverse=True)
+            lots = None
+        if record is not None and record[0] == address:
+            street_name = record[2] # Only the lot count changed; no need to re-parse
+        else:
+            street_name = parse_street_name_from_address_for_aggregation(address or "")
+            parsed += 1
+        current[key] = (address, raw_lots, street_name, lots)
+    parse_duration = time.time() - parse_start_time
+    record_phase("parse", parse_duration, rows=parsed)
+
+    # Apply the diff against whatever the state holds now; another refresh may have landed since `previous`.
+    aggregate_start_time = time.time()
+    inserted = deleted = changed = 0
+    with state["lock"]:
+        latest = state["buildings"]
+        for key, record in current.items():
+            old_record = latest.get(key)
+            if old_record is not None and old_record[0] == record[0] and old_record[1] == record[1]:
+                continue
+            if old_record is not None:
+                _apply_building(state, old_record, -1)
+                changed += 1
+            else:
+                inserted += 1
+            _apply_building(state, record, 1)
+        for key, old_record in latest.items():
+            if key not in current:
+                _apply_building(state, old_record, -1)
+                deleted += 1
+        state["buildings"] = current
+
+        label = (label or str(source[1])).upper()
+        snapshot = {
+            "street_rows": _ranked_street_rows(state, "ranking", label),
+            "street_ge20_rows": _ranked_street_rows(state, "ranking_ge20", label, min_total_lots=20),
+            "ge20_lot_sums": dict(state["ge20_lot_sums"]),
+            "building_streets": [current[key][2] for key in keys]
+        }
+
+    aggregate_duration = time.time() - aggregate_start_time
+    record_phase("aggregate", aggregate_duration, inserted=inserted, deleted=deleted, changed=changed)
+    logger.info(f"[PROFILE] refresh_street_aggregates for {source} completed in {parse_duration + aggregate_duration:.4f}s (parse {parse_duration:.4f}s for {parsed} addresses). {len(building_data)} buildings: {inserted} inserted, {deleted} deleted, {changed} changed.")
+    return snapshot
+# --- End Incremental Street Aggregates ---
 
-    cumulative_lots_running_total = 0
-    for item in aggregated_list:
-        cumulative_lots_running_total += item["total_lots_on_street"]
-        item["cumulative_lots"] = cumulative_lots_running_total
-        
-    logger.info(f"[PROFILE] aggregate_data_by_street completed in {time.time() - agg_start_time:.4f}s. Total parsing time within loop: {total_parsing_time:.4f}s. Aggregated {len(building_data_list)} buildings into {len(aggregated_list)} streets for suburb {original_suburb_query}.")
-    return aggregated_list
 
 @strata_bp.route("/search", methods=["GET"])
 def search_strata():
     suburb = request.args.get("suburb")
-    data, error = get_combined_data(suburb)
+    data, _, error = get_combined_data(suburb)
     if error:
         return jsonify({"error": error}), 400
     if data is None or not data:
          return jsonify([])
-    return jsonify(data)
+    return traced_jsonify(data)
 
 @strata_bp.route("/search_street_level", methods=["GET"])
 def search_strata_street_level():
@@ -348,16 +842,16 @@ def search_strata_street_level():
     if not suburb:
         return jsonify({"error": "Suburb parameter is required."}), 400
     logger.info(f"Street level search initiated for suburb: {suburb}")
-    building_data, error = get_combined_data(suburb)
+    building_data, source, error = get_combined_data(suburb)
     if error:
         logger.error(f"Error in get_combined_data for {suburb}: {error}")
         return jsonify({"error": error}), 400 
     if building_data is None or not building_data:
         logger.info(f"No building data found for {suburb}")
         return jsonify([])
-    street_level_data = aggregate_data_by_street(building_data, suburb)
+    street_level_data = refresh_street_aggregates(source, building_data, label=suburb)["street_rows"]
     logger.info(f"[PROFILE] /search_street_level endpoint for {suburb} completed in {time.time() - endpoint_start_time:.4f}s")
-    return jsonify(street_level_data)
+    return traced_jsonify(street_level_data)
 
 
 @strata_bp.route("/search_street_level_ge20_lots", methods=["GET"])
@@ -368,7 +862,7 @@ def search_strata_street_level_ge20_lots():
         return jsonify({"error": "Suburb parameter is required."}), 400
     
     logger.info(f"Street level search (>=20 lots) initiated for suburb: {suburb}")
-    building_data, error = get_combined_data(suburb)
+    building_data, source, error = get_combined_data(suburb)
     
     if error:
         logger.error(f"Error in get_combined_data for {suburb} (>=20 lots view): {error}")
@@ -378,46 +872,36 @@ def search_strata_street_level_ge20_lots():
         logger.info(f"No building data found for {suburb} (>=20 lots view)")
         return jsonify([])
 
-    # Step 1: Filter buildings to include only those with lottotal >= 20
-    buildings_ge20_lots = [
-        b for b in building_data 
-        if b.get("lottotal") is not None and isinstance(b.get("lottotal"), (int, str)) and int(b.get("lottotal")) >= 20
-    ]
-
-    if not buildings_ge20_lots:
-        logger.info(f"No buildings with >= 20 lots found in {suburb} for >=20 lots view")
-        return jsonify([])
-
-    # Step 2: Aggregate these filtered buildings by street
-    # The aggregate_data_by_street function will now sum lots and count properties based only on these pre-filtered buildings.
-    all_street_level_data = aggregate_data_by_street(buildings_ge20_lots, suburb)
-
-    if not all_street_level_data:
-        logger.info(f"No street level data aggregated from buildings with >=20 lots for {suburb} (>=20 lots view)")
-        return jsonify([])
-
-    # Step 3: Filter streets where the sum of lots (from >=20-lot buildings) is itself >= 20
-    filtered_street_data = [
-        street_info for street_info in all_street_level_data 
-        if street_info.get("total_lots_on_street", 0) >= 20
-    ]
+    # Streets are aggregated over buildings with >= 20 lots only, then filtered to streets whose sum is itself >= 20.
+    # Both steps, and cumulative_lots over the filtered list, come from the maintained aggregates.
+    filtered_street_data = refresh_street_aggregates(source, building_data, label=suburb)["street_ge20_rows"]
 
     if not filtered_street_data:
         logger.info(f"No streets with >= 20 lots found for {suburb}")
         return jsonify([])
 
-    # Recalculate cumulative_lots for the filtered and sorted list
-    # The list is already sorted by total_lots_on_street (desc) by aggregate_data_by_street
-    cumulative_lots_running_total = 0
-    for item in filtered_street_data:
-        cumulative_lots_running_total += item["total_lots_on_street"]
-        item["cumulative_lots"] = cumulative_lots_running_total
-
     logger.info(f"[PROFILE] /search_street_level_ge20_lots endpoint for {suburb} completed in {time.time() - endpoint_start_time:.4f}s. Found {len(filtered_street_data)} streets with >= 20 lots.")
-    return jsonify(filtered_street_data)
+    return traced_jsonify(filtered_street_data)
 
 
 # Helper functions for export functionality
+BUILDING_EXPORT_FIELDNAMES = ['record_number', 'planlabel', 'street_address_display', 'suburb', 'postcode', 'lga', 'lottotal', 'sum_of_lots_per_street', 'cumulative_lots']
+STREET_EXPORT_FIELDNAMES = ['record_number', 'street_name', 'property_count', 'total_lots_on_street', 'cumulative_lots']
+EXPORT_COLUMN_TYPES = {
+    'record_number': "int", 'planlabel': "str", 'street_address_display': "str", 'suburb': "str",
+    'postcode': "int", 'lga': "str", 'lottotal': "int", 'sum_of_lots_per_street': "int",
+    'cumulative_lots': "int", 'street_name': "str", 'property_count': "int", 'total_lots_on_street': "int"
+}
+# format -> (mimetype, file extension)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.file", "arrow"),
+}
+EXPORT_VIEW_TYPES = ("building", "building_ge20_lots", "street", "street_ge20_lots")
+EXPORT_CHUNK_ROWS = 1000 # Rows serialised per streamed chunk / Arrow record batch
+
 def parse_street_address_for_building_view(raw_address, raw_suburb):
     """Parse street address for building view display"""
     address_for_parsing = raw_address or ""
@@ -443,249 +927,465 @@ def parse_street_address_for_building_view(raw_address, raw_suburb):
     return {'number': street_number, 'name': street_name_part, 'original': address_for_parsing}
 
 
-def get_buildings_ge20_lots_data(suburb):
-    """Get buildings with >= 20 lots data for export"""
-    all_building_data, error = get_combined_data(suburb)
-    if error:
-        return None, error
-    
+def buildings_ge20_lots_columns(all_building_data, source):
+    """Build the buildings with >= 20 lots view as export columns"""
+    columns = {name: [] for name in BUILDING_EXPORT_FIELDNAMES}
     if not all_building_data:
-        return [], None
+        return columns
     
-    # Filter buildings with >= 20 lots
+    # Street-level sums over >= 20 lot buildings come from the maintained aggregates
+    aggregates = refresh_street_aggregates(source, all_building_data)
+    street_lot_sums_for_filtered_buildings = aggregates["ge20_lot_sums"]
+    
+    # Filter buildings with >= 20 lots, keeping each one's parsed street
     buildings_ge20_lots_filtered = [
-        b for b in all_building_data 
+        (b, street_name) for b, street_name in zip(all_building_data, aggregates["building_streets"])
         if b.get("lottotal") is not None and isinstance(b.get("lottotal"), (int, str)) and int(b.get("lottotal")) >= 20
     ]
     
-    if not buildings_ge20_lots_filtered:
-        return [], None
-    
-    # Calculate street-level sums for filtered buildings
-    street_lot_sums_for_filtered_buildings = defaultdict(int)
-    for building in buildings_ge20_lots_filtered:
-        address_str = building.get("address", "")
-        street_name_for_sum = parse_street_name_from_address_for_aggregation(address_str)
-        street_lot_sums_for_filtered_buildings[street_name_for_sum] += int(building.get("lottotal", 0))
-    
-    # Add calculated sums and cumulative lots
-    processed_buildings = []
     cumulative_lots_running_total = 0
-    for building in buildings_ge20_lots_filtered:
-        processed_building = building.copy()
-        address_str = processed_building.get("address", "")
-        street_name_for_sum = parse_street_name_from_address_for_aggregation(address_str)
-        
-        processed_building["sum_of_lots_per_street"] = street_lot_sums_for_filtered_buildings.get(street_name_for_sum, 0)
-        
-        cumulative_lots_running_total += int(processed_building.get("lottotal", 0))
-        processed_building["cumulative_lots"] = cumulative_lots_running_total
-        
-        processed_buildings.append(processed_building)
+    for i, (building, street_name_for_sum) in enumerate(buildings_ge20_lots_filtered):
+        lots = int(building.get("lottotal", 0))
+        cumulative_lots_running_total += lots
+        parsed_address = parse_street_address_for_building_view(building.get('address', ''), building.get('suburb', ''))
+        columns['record_number'].append(i + 1)
+        columns['planlabel'].append(building.get('planlabel', ''))
+        columns['street_address_display'].append(parsed_address['original'])
+        columns['suburb'].append(building.get('suburb', ''))
+        columns['postcode'].append(building.get('postcode', ''))
+        columns['lga'].append(building.get('lga', ''))
+        columns['lottotal'].append(building.get('lottotal', 0))
+        columns['sum_of_lots_per_street'].append(street_lot_sums_for_filtered_buildings.get(street_name_for_sum, 0))
+        columns['cumulative_lots'].append(cumulative_lots_running_total)
     
-    return processed_buildings, None
+    return columns
 
 
-def get_street_level_data(suburb):
-    """Get street level data for export"""
-    building_data, error = get_combined_data(suburb)
-    if error:
-        return None, error
-    
+def street_level_rows(building_data, source):
+    """Build street level rows for export"""
     if not building_data:
-        return [], None
+        return []
     
-    street_level_data = aggregate_data_by_street(building_data, suburb)
-    return street_level_data, None
+    return refresh_street_aggregates(source, building_data)["street_rows"]
 
 
-def get_street_level_ge20_lots_data(suburb):
-    """Get street level data with >= 20 lots for export"""
-    building_data, error = get_combined_data(suburb)
-    if error:
-        return None, error
-    
+def street_level_ge20_lots_rows(building_data, source):
+    """Build street level rows with >= 20 lots for export"""
     if not building_data:
-        return [], None
-    
-    # Filter buildings with >= 20 lots
-    buildings_ge20_lots = [
-        b for b in building_data 
-        if b.get("lottotal") is not None and isinstance(b.get("lottotal"), (int, str)) and int(b.get("lottotal")) >= 20
-    ]
-    
-    if not buildings_ge20_lots:
-        return [], None
-    
-    # Aggregate filtered buildings by street
-    all_street_level_data = aggregate_data_by_street(buildings_ge20_lots, suburb)
-    
-    if not all_street_level_data:
-        return [], None
+        return []
     
-    # Filter streets where sum of lots >= 20
-    filtered_street_data = [
-        street_info for street_info in all_street_level_data 
-        if street_info.get("total_lots_on_street", 0) >= 20
-    ]
+    return refresh_street_aggregates(source, building_data)["street_ge20_rows"]
+
+
+def building_columns(data):
+    """Build the full building view as export columns"""
+    columns = {name: [] for name in BUILDING_EXPORT_FIELDNAMES}
+    if not data:
+        return columns
     
-    if not filtered_street_data:
-        return [], None
+    # Calculate street-level sums for building view, keeping each parsed address for the second pass
+    street_name_lots_sum = defaultdict(int)
+    parsed_addresses = {}
+    for item in data:
+        parsed_address = parse_street_address_for_building_view(item.get('address', ''), item.get('suburb', ''))
+        parsed_addresses[id(item)] = parsed_address
+        street_name_lots_sum[parsed_address['name']] += int(item.get('lottotal', 0))
     
-    # Recalculate cumulative lots
-    cumulative_lots_running_total = 0
-    for item in filtered_street_data:
-        cumulative_lots_running_total += item["total_lots_on_street"]
-        item["cumulative_lots"] = cumulative_lots_running_total
+    # Sort by lots descending and fill the calculated columns
+    sorted_data = sorted(data, key=lambda x: int(x.get('lottotal', 0)), reverse=True)
+    cumulative_lots = 0
+    for i, item in enumerate(sorted_data):
+        cumulative_lots += int(item.get('lottotal', 0))
+        parsed_address = parsed_addresses[id(item)]
+        columns['record_number'].append(i + 1)
+        columns['planlabel'].append(item.get('planlabel', ''))
+        columns['street_address_display'].append(parsed_address['original'])
+        columns['suburb'].append(item.get('suburb', ''))
+        columns['postcode'].append(item.get('postcode', ''))
+        columns['lga'].append(item.get('lga', ''))
+        columns['lottotal'].append(item.get('lottotal', 0))
+        columns['sum_of_lots_per_street'].append(street_name_lots_sum[parsed_address['name']])
+        columns['cumulative_lots'].append(cumulative_lots)
     
-    return filtered_street_data, None
+    return columns
+
+
+def street_rows_to_columns(street_rows):
+    """Convert aggregated street rows into export columns"""
+    columns = {name: [] for name in STREET_EXPORT_FIELDNAMES}
+    for i, item in enumerate(street_rows or []):
+        columns['record_number'].append(i + 1)
+        columns['street_name'].append(item.get('street_name', ''))
+        columns['property_count'].append(item.get('property_count', 0))
+        columns['total_lots_on_street'].append(item.get('total_lots_on_street', 0))
+        columns['cumulative_lots'].append(item.get('cumulative_lots', 0))
+    return columns
+
+
+def build_export_columns(building_data, view_type, source):
+    """Build (fieldnames, columns) for an export view from fetched building data. Returns ((fieldnames, columns), error).
+    source is the resolved source the data came from, as returned by get_combined_data / get_export_source_data."""
+    if view_type == "building":
+        return (BUILDING_EXPORT_FIELDNAMES, building_columns(building_data)), None
+    if view_type == "building_ge20_lots":
+        return (BUILDING_EXPORT_FIELDNAMES, buildings_ge20_lots_columns(building_data, source)), None
+    if view_type == "street":
+        return (STREET_EXPORT_FIELDNAMES, street_rows_to_columns(street_level_rows(building_data, source))), None
+    if view_type == "street_ge20_lots":
+        return (STREET_EXPORT_FIELDNAMES, street_rows_to_columns(street_level_ge20_lots_rows(building_data, source))), None
+    return None, "Invalid view type"
+
+
+def _export_column_as_int(values):
+    """Coerce a column to ints for typed output; blanks and unparseable values become nulls."""
+    coerced = []
+    for value in values:
+        try:
+            coerced.append(int(value))
+        except (ValueError, TypeError):
+            coerced.append(None)
+    return coerced
+
+
+def _export_column_as_str(values):
+    return [None if value is None else str(value) for value in values]
+
+
+def build_export_table(fieldnames, columns):
+    """Build a typed pyarrow Table straight from the column buffers."""
+    arrays = []
+    fields = []
+    for name in fieldnames:
+        if EXPORT_COLUMN_TYPES[name] == "int":
+            arrays.append(pa.array(_export_column_as_int(columns[name]), type=pa.int64()))
+            fields.append(pa.field(name, pa.int64()))
+        else:
+            arrays.append(pa.array(_export_column_as_str(columns[name]), type=pa.string()))
+            fields.append(pa.field(name, pa.string()))
+    return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+
+def iter_export_chunks(fieldnames, columns, export_format, rows_callback=None):
+    """Yield the serialised export (str for text formats, bytes for binary ones) in chunks.
+    rows_callback, if given, is called with the number of rows covered by each chunk."""
+    row_count = len(columns[fieldnames[0]]) if fieldnames else 0
+    if rows_callback is None:
+        rows_callback = lambda rows: None
+    if export_format == "csv":
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(fieldnames)
+        for start in range(0, row_count, EXPORT_CHUNK_ROWS):
+            writer.writerows(zip(*(columns[name][start:start + EXPORT_CHUNK_ROWS] for name in fieldnames)))
+            rows_callback(min(EXPORT_CHUNK_ROWS, row_count - start))
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate(0)
+        if output.tell():
+            yield output.getvalue()
+        output.close()
+    elif export_format == "ndjson":
+        # Key prefixes are encoded once; each line is then assembled from the column values directly.
+        key_prefixes = [json.dumps(name) + ":" for name in fieldnames]
+        int_columns = {name for name in fieldnames if EXPORT_COLUMN_TYPES[name] == "int"}
+        typed_columns = [
+            _export_column_as_int(columns[name]) if name in int_columns else columns[name]
+            for name in fieldnames
+        ]
+        for start in range(0, row_count, EXPORT_CHUNK_ROWS):
+            lines = []
+            for values in zip(*(column[start:start + EXPORT_CHUNK_ROWS] for column in typed_columns)):
+                lines.append("{" + ",".join(prefix + json.dumps(value) for prefix, value in zip(key_prefixes, values)) + "}\n")
+            rows_callback(len(lines))
+            yield "".join(lines)
+    elif export_format == "parquet":
+        buffer = io.BytesIO()
+        pq.write_table(build_export_table(fieldnames, columns), buffer)
+        rows_callback(row_count)
+        yield buffer.getvalue()
+    elif export_format == "arrow":
+        table = build_export_table(fieldnames, columns)
+        buffer = io.BytesIO()
+        with pa.ipc.new_file(buffer, table.schema) as ipc_writer:
+            ipc_writer.write_table(table, max_chunksize=EXPORT_CHUNK_ROWS)
+        rows_callback(row_count)
+        yield buffer.getvalue()
+    else:
+        raise ValueError(f"Unsupported export format: {export_format}")
 
 
 @strata_bp.route("/export", methods=["GET"])
 def export_strata_csv():
     suburb = request.args.get("suburb")
     view_type = request.args.get("view", "building")  # Default to building view
+    export_format = request.args.get("format", "csv").lower()  # Default to CSV
     
-    if view_type == "building":
-        data, error = get_combined_data(suburb)
-        if error:
-            return jsonify({"error": error}), 400
-        
-        # Process data for building view with calculated columns
-        if data:
-            # Calculate street-level sums for building view
-            street_name_lots_sum = {}
-            for item in data:
-                parsed_address = parse_street_address_for_building_view(item.get('address', ''), item.get('suburb', ''))
-                street_name = parsed_address['name']
-                lots = int(item.get('lottotal', 0))
-                street_name_lots_sum[street_name] = street_name_lots_sum.get(street_name, 0) + lots
-            
-            # Sort by lots descending and add calculated columns
-            sorted_data = sorted(data, key=lambda x: int(x.get('lottotal', 0)), reverse=True)
-            cumulative_lots = 0
-            export_data = []
-            for i, item in enumerate(sorted_data):
-                cumulative_lots += int(item.get('lottotal', 0))
-                parsed_address = parse_street_address_for_building_view(item.get('address', ''), item.get('suburb', ''))
-                street_name = parsed_address['name']
-                
-                export_row = {
-                    'record_number': i + 1,
-                    'planlabel': item.get('planlabel', ''),
-                    'street_address_display': parsed_address['original'],
-                    'suburb': item.get('suburb', ''),
-                    'postcode': item.get('postcode', ''),
-                    'lga': item.get('lga', ''),
-                    'lottotal': item.get('lottotal', 0),
-                    'sum_of_lots_per_street': street_name_lots_sum.get(street_name, 0),
-                    'cumulative_lots': cumulative_lots
-                }
-                export_data.append(export_row)
-            
-            fieldnames = ['record_number', 'planlabel', 'street_address_display', 'suburb', 'postcode', 'lga', 'lottotal', 'sum_of_lots_per_street', 'cumulative_lots']
-            data = export_data
-        else:
-            fieldnames = ['record_number', 'planlabel', 'street_address_display', 'suburb', 'postcode', 'lga', 'lottotal', 'sum_of_lots_per_street', 'cumulative_lots']
-            data = []
-            
-    elif view_type == "building_ge20_lots":
-        data, error = get_buildings_ge20_lots_data(suburb)
-        if error:
-            return jsonify({"error": error}), 400
-        
-        if data:
-            export_data = []
-            for i, item in enumerate(data):
-                parsed_address = parse_street_address_for_building_view(item.get('address', ''), item.get('suburb', ''))
-                
-                export_row = {
-                    'record_number': i + 1,
-                    'planlabel': item.get('planlabel', ''),
-                    'street_address_display': parsed_address['original'],
-                    'suburb': item.get('suburb', ''),
-                    'postcode': item.get('postcode', ''),
-                    'lga': item.get('lga', ''),
-                    'lottotal': item.get('lottotal', 0),
-                    'sum_of_lots_per_street': item.get('sum_of_lots_per_street', 0),
-                    'cumulative_lots': item.get('cumulative_lots', 0)
-                }
-                export_data.append(export_row)
-            
-            fieldnames = ['record_number', 'planlabel', 'street_address_display', 'suburb', 'postcode', 'lga', 'lottotal', 'sum_of_lots_per_street', 'cumulative_lots']
-            data = export_data
-        else:
-            fieldnames = ['record_number', 'planlabel', 'street_address_display', 'suburb', 'postcode', 'lga', 'lottotal', 'sum_of_lots_per_street', 'cumulative_lots']
-            data = []
-            
-    elif view_type == "street":
-        data, error = get_street_level_data(suburb)
-        if error:
-            return jsonify({"error": error}), 400
-        
-        if data:
-            export_data = []
-            for i, item in enumerate(data):
-                export_row = {
-                    'record_number': i + 1,
-                    'street_name': item.get('street_name', ''),
-                    'property_count': item.get('property_count', 0),
-                    'total_lots_on_street': item.get('total_lots_on_street', 0),
-                    'cumulative_lots': item.get('cumulative_lots', 0)
-                }
-                export_data.append(export_row)
-            
-            fieldnames = ['record_number', 'street_name', 'property_count', 'total_lots_on_street', 'cumulative_lots']
-            data = export_data
-        else:
-            fieldnames = ['record_number', 'street_name', 'property_count', 'total_lots_on_street', 'cumulative_lots']
-            data = []
-            
-    elif view_type == "street_ge20_lots":
-        data, error = get_street_level_ge20_lots_data(suburb)
-        if error:
-            return jsonify({"error": error}), 400
-        
-        if data:
-            export_data = []
-            for i, item in enumerate(data):
-                export_row = {
-                    'record_number': i + 1,
-                    'street_name': item.get('street_name', ''),
-                    'property_count': item.get('property_count', 0),
-                    'total_lots_on_street': item.get('total_lots_on_street', 0),
-                    'cumulative_lots': item.get('cumulative_lots', 0)
-                }
-                export_data.append(export_row)
-            
-            fieldnames = ['record_number', 'street_name', 'property_count', 'total_lots_on_street', 'cumulative_lots']
-            data = export_data
-        else:
-            fieldnames = ['record_number', 'street_name', 'property_count', 'total_lots_on_street', 'cumulative_lots']
-            data = []
-    else:
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"error": f"Invalid export format. Supported formats: {', '.join(EXPORT_FORMATS)}"}), 400
+    
+    if view_type not in EXPORT_VIEW_TYPES:
         return jsonify({"error": "Invalid view type"}), 400
     
-    # Generate CSV
-    output = io.StringIO()
-    writer = csv.DictWriter(output, fieldnames=fieldnames)
-    writer.writeheader()
-    if data:
-        writer.writerows(data)
-    csv_data = output.getvalue()
-    output.close()
+    data, source, error = get_combined_data(suburb)
+    if error:
+        return jsonify({"error": error}), 400
+    
+    with traced("columns", view=view_type): # Includes the parse/aggregate phases of the street aggregates
+        export_columns, error = build_export_columns(data, view_type, source)
+    if error:
+        return jsonify({"error": error}), 400
+    fieldnames, columns = export_columns
     
+    mimetype, extension = EXPORT_FORMATS[export_format]
     filename_suburb = suburb.replace(" ", "_").replace("/", "-") if suburb else "export"
-    filename = f"strata_export_{view_type}_{filename_suburb}.csv"
+    filename = f"strata_export_{view_type}_{filename_suburb}.{extension}"
     
     return Response(
-        csv_data,
-        mimetype="text/csv",
+        traced_stream(iter_export_chunks(fieldnames, columns, export_format)),
+        mimetype=mimetype,
         headers={"Content-Disposition": f"attachment;filename={filename}"}
     )
 
 
+# --- Background Export Jobs ---
+EXPORT_JOB_WORKERS = int(os.environ.get("EXPORT_JOB_WORKERS", "2")) # Bounded pool; extra jobs wait in the queue
+EXPORT_JOB_DIR = os.path.join(tempfile.gettempdir(), "nsw_export_jobs")
+EXPORT_JOB_RESULT_TTL = 3600 # Seconds a finished result is kept for download and reuse
+EXPORT_JOB_MAX_PENDING = int(os.environ.get("EXPORT_JOB_MAX_PENDING", "20")) # Queued + running jobs; new submissions over this get 429
+EXPORT_JOB_MAX_RETAINED = 200 # Finished/failed jobs kept; the oldest are dropped beyond this even inside the TTL
+EXPORT_JOB_SOURCE_TYPES = ("suburb", "postcode", "lga")
+
+EXPORT_JOBS = {} # job_id -> job dict
+EXPORT_JOBS_BY_KEY = {} # (source_type, source_value, view, format) -> job_id, for reuse by identical jobs
+_export_jobs_lock = threading.Lock()
+_export_job_executor = ThreadPoolExecutor(max_workers=EXPORT_JOB_WORKERS, thread_name_prefix="export-job")
+
+
+def get_export_source_data(source_type, source_value, progress_callback=None):
+    """Fetch building data for a suburb, postcode or LGA export source. Returns (data, source, error) like get_combined_data."""
+    if source_type == "suburb":
+        return get_combined_data(source_value, progress_callback)
+    if source_type == "postcode":
+        data, error = fetch_strata_data(f"postcode = {int(source_value)}", progress_callback)
+        return data, ("postcode", int(source_value)), error
+    if source_type == "lga":
+        sanitized_lga_sql = source_value.replace("'", "''")
+        # Exact match: a substring match would merge e.g. NORTH SYDNEY into an export for SYDNEY.
+        data, error = fetch_strata_data(f"UPPER(lga) = UPPER('{sanitized_lga_sql}')", progress_callback)
+        return data, ("lga", source_value.upper()), error
+    return None, None, f"Invalid export source: {source_type}"
+
+
+def _parse_export_job_source(params):
+    """Pick the single suburb/postcode/LGA source out of the job parameters. Returns ((source_type, source_value), error)."""
+    provided = [(name, str(params.get(name)).strip()) for name in EXPORT_JOB_SOURCE_TYPES if params.get(name)]
+    if len(provided) != 1:
+        return None, "Provide exactly one of suburb, postcode or lga."
+    source_type, source_value = provided[0]
+    if source_type == "postcode":
+        if not re.fullmatch(r"\d{4}", source_value):
+            return None, f"Invalid postcode: \"{source_value}\". Please enter a 4 digit NSW postcode."
+        return (source_type, source_value), None
+    return (source_type, source_value.upper()), None
+
+
+def _export_job_status(job):
+    """Public view of a job for the progress endpoint"""
+    status = {key: value for key, value in job.items() if key not in ("key", "file_path")}
+    if job["status"] == "finished":
+        status["download_url"] = url_for("strata.download_export_job", job_id=job["job_id"])
+    return status
+
 
+def _remove_export_job(job):
+    """Forget a finished or failed job and delete its file. Caller holds the lock."""
+    if job["file_path"]:
+        try:
+            os.remove(job["file_path"])
+        except OSError:
+            pass
+    del EXPORT_JOBS[job["job_id"]]
+    if EXPORT_JOBS_BY_KEY.get(job["key"]) == job["job_id"]:
+        del EXPORT_JOBS_BY_KEY[job["key"]]
+
+
+def _remove_stale_export_files(cutoff, keep=()):
+    """Delete files in EXPORT_JOB_DIR last modified before cutoff, e.g. left behind by a previous process"""
+    try:
+        file_names = os.listdir(EXPORT_JOB_DIR)
+    except OSError:
+        return
+    for file_name in file_names:
+        file_path = os.path.join(EXPORT_JOB_DIR, file_name)
+        try:
+            if file_path not in keep and os.path.getmtime(file_path) < cutoff:
+                os.remove(file_path)
+        except OSError:
+            pass
+
+
+def _prune_export_jobs():
+    """Drop finished or failed jobs older than EXPORT_JOB_RESULT_TTL, then the oldest beyond EXPORT_JOB_MAX_RETAINED. Caller holds the lock."""
+    cutoff = time.time() - EXPORT_JOB_RESULT_TTL
+    done_jobs = sorted((job for job in EXPORT_JOBS.values() if job["finished_at"] is not None), key=lambda job: job["finished_at"])
+    excess = len(done_jobs) - EXPORT_JOB_MAX_RETAINED
+    for i, job in enumerate(done_jobs):
+        if i < excess or job["finished_at"] <= cutoff:
+            _remove_export_job(job)
+    # Files no job refers to (left by an earlier process) are dropped once they are past the TTL too
+    _remove_stale_export_files(cutoff, keep={job["file_path"] for job in EXPORT_JOBS.values() if job["file_path"]})
+
+
+def _get_export_job(job_id):
+    with _export_jobs_lock:
+        _prune_export_jobs()
+        return EXPORT_JOBS.get(job_id)
+
+
+# Results from a previous process are unreachable (job records live in memory), so clear them at startup.
+# Only files past the TTL go, in case another worker process shares the directory; younger ones are
+# picked up by _prune_export_jobs once they age out.
+_remove_stale_export_files(time.time() - EXPORT_JOB_RESULT_TTL)
+
+
+def run_export_job(job):
+    """Worker body: fetch, build columns and write the export file, updating progress on the job as it goes"""
+    job_start_time = time.time()
+    job["status"] = "running"
+    job["started_at"] = job_start_time
+
+    def on_page(feature_count):
+        job["pages_fetched"] += 1
+        job["rows_fetched"] += feature_count
+
+    def on_rows(row_count):
+        job["rows_written"] += row_count
+
+    partial_path = None
+    try:
+        data, source, error = get_export_source_data(job["source_type"], job["source_value"], on_page)
+        if error:
+            raise ValueError(error)
+        export_columns, error = build_export_columns(data, job["view"], source)
+        if error:
+            raise ValueError(error)
+        fieldnames, columns = export_columns
+        job["total_rows"] = len(columns[fieldnames[0]])
+
+        os.makedirs(EXPORT_JOB_DIR, exist_ok=True)
+        file_path = os.path.join(EXPORT_JOB_DIR, f"{job['job_id']}.{EXPORT_FORMATS[job['format']][1]}")
+        partial_path = file_path + ".part"
+        with open(partial_path, "wb") as outfile:
+            for chunk in iter_export_chunks(fieldnames, columns, job["format"], on_rows):
+                outfile.write(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+        os.replace(partial_path, file_path)
+        job["file_path"] = file_path
+        job["status"] = "finished"
+        logger.info(f"[PROFILE] export job {job['job_id']} ({job['source_type']}={job['source_value']}, {job['view']}, {job['format']}) completed in {time.time() - job_start_time:.4f}s. Rows written: {job['rows_written']}")
+    except Exception as e:
+        logger.error(f"Export job {job['job_id']} failed: {e}")
+        job["status"] = "failed"
+        job["error"] = str(e)
+        if partial_path and os.path.exists(partial_path):
+            os.remove(partial_path)
+    finally:
+        job["finished_at"] = time.time()
+
+
+def submit_export_job(source_type, source_value, view_type, export_format):
+    """Queue an export job, or return the existing job for an identical request. Returns ((job, reused), error)."""
+    key = (source_type, source_value, view_type, export_format)
+    with _export_jobs_lock:
+        _prune_export_jobs()
+        existing_job_id = EXPORT_JOBS_BY_KEY.get(key)
+        if existing_job_id and EXPORT_JOBS[existing_job_id]["status"] != "failed":
+            return (EXPORT_JOBS[existing_job_id], True), None
+        pending = sum(1 for job in EXPORT_JOBS.values() if job["status"] in ("queued", "running"))
+        if pending >= EXPORT_JOB_MAX_PENDING:
+            return None, f"Too many export jobs in progress ({pending}). Please try again later."
+
+        job_id = uuid.uuid4().hex
+        filename_source = source_value.replace(" ", "_").replace("/", "-")
+        job = {
+            "job_id": job_id,
+            "key": key,
+            "status": "queued",
+            "source_type": source_type,
+            "source_value": source_value,
+            "view": view_type,
+            "format": export_format,
+            "filename": f"strata_export_{view_type}_{filename_source}.{EXPORT_FORMATS[export_format][1]}",
+            "pages_fetched": 0,
+            "rows_fetched": 0,
+            "rows_written": 0,
+            "total_rows": None,
+            "error": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "file_path": None,
+        }
+        EXPORT_JOBS[job_id] = job
+        EXPORT_JOBS_BY_KEY[key] = job_id
+    _export_job_executor.submit(run_export_job, job)
+    return (job, False), None
+
+
+@strata_bp.route("/export_jobs", methods=["POST"])
+def create_export_job():
+    params = request.get_json(silent=True)
+    if params is None:
+        params = request.values
+    elif not isinstance(params, dict):
+        return jsonify({"error": "Provide the export job as a JSON object or form fields."}), 400
+    view_type = params.get("view", "building")
+    export_format = str(params.get("format", "csv")).lower()
+
+    if view_type not in EXPORT_VIEW_TYPES:
+        return jsonify({"error": "Invalid view type"}), 400
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"error": f"Invalid export format. Supported formats: {', '.join(EXPORT_FORMATS)}"}), 400
+    source, error = _parse_export_job_source(params)
+    if error:
+        return jsonify({"error": error}), 400
+
+    submitted, error = submit_export_job(source[0], source[1], view_type, export_format)
+    if error:
+        return jsonify({"error": error}), 429, {"Retry-After": "30"}
+    job, reused = submitted
+    status = _export_job_status(job)
+    status["reused"] = reused
+    return jsonify(status), 202
+
+
+@strata_bp.route("/export_jobs/<job_id>", methods=["GET"])
+def get_export_job(job_id):
+    job = _get_export_job(job_id)
+    if not job:
+        return jsonify({"error": "Unknown export job."}), 404
+    return jsonify(_export_job_status(job))
+
+
+@strata_bp.route("/export_jobs/<job_id>/download", methods=["GET"])
+def download_export_job(job_id):
+    job = _get_export_job(job_id)
+    if not job:
+        return jsonify({"error": "Unknown export job."}), 404
+    if job["status"] != "finished":
+        return jsonify({"error": f"Export job is {job['status']}.", "status": job["status"]}), 409
+    # conditional=True lets Werkzeug answer Range / If-Range requests so interrupted downloads can resume.
+    try:
+        return send_file(
+            job["file_path"],
+            mimetype=EXPORT_FORMATS[job["format"]][0],
+            as_attachment=True,
+            download_name=job["filename"],
+            conditional=True
+        )
+    except FileNotFoundError:
+        # Pruned by a concurrent request between the lookup and opening the file
+        return jsonify({"error": "Export job result has expired. Please submit the export again."}), 410
+# --- End Background Export Jobs ---
 
 
 @strata_bp.route("/search_buildings_ge20_lots", methods=["GET"])
@@ -696,7 +1396,7 @@ def search_buildings_ge20_lots():
         return jsonify({"error": "Suburb parameter is required."}), 400
     
     logger.info(f"Filtered building search (>=20 lots) initiated for suburb: {suburb}")
-    all_building_data, error = get_combined_data(suburb)
+    all_building_data, source, error = get_combined_data(suburb)
     
     if error:
         logger.error(f"Error in get_combined_data for {suburb} (buildings >=20 lots view): {error}")
@@ -706,10 +1406,15 @@ def search_buildings_ge20_lots():
         logger.info(f"No building data found for {suburb} (buildings >=20 lots view)")
         return jsonify([])
 
+    # "Sum of Lots per Street" is based *only* on buildings with >= 20 lots, grouped with the same street
+    # parsing as the street view; both the sums and each building's street come from the maintained aggregates.
+    aggregates = refresh_street_aggregates(source, all_building_data)
+    street_lot_sums_for_filtered_buildings = aggregates["ge20_lot_sums"]
+
     # Step 1: Filter buildings to include only those with lottotal >= 20
     # The fetch_strata_data already sorts by lottotal DESC, so this filtered list will maintain that order initially.
     buildings_ge20_lots_filtered = [
-        b for b in all_building_data 
+        (b, street_name) for b, street_name in zip(all_building_data, aggregates["building_streets"])
         if b.get("lottotal") is not None and isinstance(b.get("lottotal"), (int, str)) and int(b.get("lottotal")) >= 20
     ]
 
@@ -717,25 +1422,13 @@ def search_buildings_ge20_lots():
         logger.info(f"No buildings with >= 20 lots found in {suburb} for filtered building view")
         return jsonify([])
 
-    # Step 2: Calculate "Sum of Lots per Street" based *only* on these filtered buildings
-    # Group filtered buildings by street to calculate this sum
-    street_lot_sums_for_filtered_buildings = defaultdict(int)
-    for building in buildings_ge20_lots_filtered:
-        address_str = building.get("address", "")
-        # Use the same street parsing logic as street view for consistency in grouping
-        street_name_for_sum = parse_street_name_from_address_for_aggregation(address_str)
-        street_lot_sums_for_filtered_buildings[street_name_for_sum] += int(building.get("lottotal", 0))
-
-    # Step 3: Add the calculated sum to each building and prepare the final list
+    # Step 2: Add the street sum to each building and prepare the final list
     # The list is already sorted by lottotal DESC from fetch_strata_data
     processed_buildings = []
     cumulative_lots_running_total = 0
-    for building in buildings_ge20_lots_filtered:
+    for building, street_name_for_sum in buildings_ge20_lots_filtered:
         # Create a copy to avoid modifying the original list items if they are referenced elsewhere
         processed_building = building.copy()
-        address_str = processed_building.get("address", "")
-        street_name_for_sum = parse_street_name_from_address_for_aggregation(address_str)
-        
         processed_building["sum_of_lots_per_street"] = street_lot_sums_for_filtered_buildings.get(street_name_for_sum, 0)
         
         # Calculate cumulative lots for this filtered view
@@ -745,6 +1438,121 @@ def search_buildings_ge20_lots():
         processed_buildings.append(processed_building)
 
     logger.info(f"[PROFILE] /search_buildings_ge20_lots endpoint for {suburb} completed in {time.time() - endpoint_start_time:.4f}s. Found {len(processed_buildings)} buildings with >= 20 lots.")
-    return jsonify(processed_buildings)
+    return traced_jsonify(processed_buildings)
+
+
+def build_all_views(building_data, original_suburb_query, source):
+    """Build the building, street, >=20 building and >=20 street views in one pass over the fetched features.
+
+    The payload is compact: buildings are rows sorted by lottotal desc, and street names, suburbs and LGAs
+    are indexes into the shared "strings" lists. Building-type views are aligned with buildings.rows; the
+    >=20 buildings are the first `count` rows, so their cumulative lots match the building view's.
+    Street-level figures come from the maintained aggregates for the resolved source.
+    """
+    views_start_time = time.time()
+    strings = {"streets": [], "suburbs": [], "lgas": []}
+    string_indexes = {name: {} for name in strings}
+
+    def intern(kind, value):
+        index = string_indexes[kind].get(value)
+        if index is None:
+            index = string_indexes[kind][value] = len(strings[kind])
+            strings[kind].append(value)
+        return index
+
+    def lots_of(building):
+        try:
+            return int(building.get("lottotal"))
+        except (ValueError, TypeError):
+            return None
+
+    sorted_buildings = sorted(building_data or [], key=lambda b: lots_of(b) or 0, reverse=True)
+    aggregates = refresh_street_aggregates(source, sorted_buildings)
+    ge20_lot_sums = aggregates["ge20_lot_sums"]
+
+    building_rows = []
+    building_view_streets = [] # Per building: street key used for the building view's per-street sum
+    ge20_building_sums = [] # Per >=20 building: lots over >=20 buildings on its (aggregation) street
+    building_view_sums = defaultdict(int)
+    total_parsing_time = 0
+
+    for building, street_name in zip(sorted_buildings, aggregates["building_streets"]):
+        item_suburb = building.get("suburb") or ""
+        lots = lots_of(building)
 
+        parsing_start_time_item = time.time()
+        parsed_address = parse_street_address_for_building_view(building.get("address"), item_suburb)
+        total_parsing_time += time.time() - parsing_start_time_item
+
+        building_rows.append([
+            building.get("planlabel") or "",
+            parsed_address["original"],
+            intern("suburbs", item_suburb),
+            building.get("postcode"),
+            intern("lgas", building.get("lga") or ""),
+            lots if lots is not None else 0
+        ])
+        building_view_streets.append(parsed_address["name"])
+        building_view_sums[parsed_address["name"]] += lots or 0
+        if lots is not None and lots >= 20:
+            ge20_building_sums.append(ge20_lot_sums.get(street_name, 0))
+
+    cumulative_lots = []
+    cumulative_lots_running_total = 0
+    for row in building_rows:
+        cumulative_lots_running_total += row[5]
+        cumulative_lots.append(cumulative_lots_running_total)
+
+    street_rows, ge20_street_rows = [
+        [[intern("streets", item["street_name"]), item["property_count"], item["total_lots_on_street"], item["cumulative_lots"]] for item in rows]
+        for rows in (aggregates["street_rows"], aggregates["street_ge20_rows"])
+    ]
+
+    payload = {
+        "suburb": original_suburb_query.upper() if original_suburb_query else "",
+        "strings": strings,
+        "buildings": {
+            "columns": ["planlabel", "street_address_display", "suburb", "postcode", "lga", "lottotal"],
+            "rows": building_rows
+        },
+        "views": {
+            "building": {
+                "sum_of_lots_per_street": [building_view_sums[name] for name in building_view_streets],
+                "cumulative_lots": cumulative_lots
+            },
+            "building_ge20_lots": {
+                "count": len(ge20_building_sums),
+                "sum_of_lots_per_street": ge20_building_sums
+            },
+            "street": {
+                "columns": ["street_name", "property_count", "total_lots_on_street", "cumulative_lots"],
+                "rows": street_rows
+            },
+            "street_ge20_lots": {
+                "columns": ["street_name", "property_count", "total_lots_on_street", "cumulative_lots"],
+                "rows": ge20_street_rows
+            }
+        }
+    }
+    record_phase("parse", total_parsing_time, rows=len(building_rows), view="building")
+    logger.info(f"[PROFILE] build_all_views completed in {time.time() - views_start_time:.4f}s. Total parsing time within loop: {total_parsing_time:.4f}s. {len(building_rows)} buildings, {len(street_rows)} streets for suburb {original_suburb_query}.")
+    return payload
+
+
+@strata_bp.route("/search_views", methods=["GET"])
+def search_all_views():
+    endpoint_start_time = time.time()
+    suburb = request.args.get("suburb")
+    if not suburb:
+        return jsonify({"error": "Suburb parameter is required."}), 400
+
+    logger.info(f"Combined view search initiated for suburb: {suburb}")
+    building_data, source, error = get_combined_data(suburb)
+
+    if error:
+        logger.error(f"Error in get_combined_data for {suburb} (combined views): {error}")
+        return jsonify({"error": error}), 400
 
+    payload = build_all_views(building_data, suburb, source)
+    logger.info(f"[PROFILE] /search_views endpoint for {suburb} completed in {time.time() - endpoint_start_time:.4f}s")
+    return traced_jsonify(payload)